@@ -9,21 +9,211 @@ import sys
 import json
 import subprocess
 import time
+import select
+import signal
+import threading
 import logging
-import glob
+import logging.handlers
+import queue
+import atexit
+import tempfile
 from datetime import datetime, timedelta
+from io import BytesIO
 from pathlib import Path
 import argparse
 import math
+import struct
+from concurrent.futures import ThreadPoolExecutor
 
 try:
-    import ephem
+    import numpy as np
     import requests
+    from scipy.signal import firwin, lfilter, upfirdn
+    from sgp4.api import Satrec, SatrecArray, WGS72, jday
 except ImportError:
     print("Error: Required Python packages not installed.")
-    print("Run: sudo pip3 install ephem requests --break-system-packages")
+    print("Run: sudo pip3 install sgp4 numpy scipy requests --break-system-packages")
     sys.exit(1)
 
+# Sampling interval for pass prediction, in seconds
+PREDICT_STEP = 30
+
+# Minimum horizon of cached pass predictions, in hours
+PASS_CACHE_HOURS = 72
+
+# WGS84 ellipsoid (km) used for the observer position
+EARTH_RADIUS = 6378.137
+EARTH_FLATTENING = 1 / 298.257223563
+
+# Speed of light in km/s, for Doppler shift from range rate
+SPEED_OF_LIGHT = 299792.458
+
+# rtl_sdr IQ rate as a multiple of reception.sample_rate when Doppler is
+# corrected in software (60000 Hz gives 240000, within rtl_sdr's range)
+IQ_OVERSAMPLE = 4
+
+# Sample rate noaa-apt expects its input audio at
+APT_SAMPLE_RATE = 11025
+
+# APT amplitude-modulated subcarrier frequency in Hz
+APT_CARRIER = 2400
+
+# Image variants produced by noaa-apt:
+# (processing config flag, noaa-apt -c mode, file suffix, log label)
+NOAA_APT_VARIANTS = [
+    ('generate_basic', None, '', 'basic'),
+    ('generate_msa', 'msa', '_MSA', 'MSA'),
+    ('generate_msa_precip', 'msa-precip', '_MSA_PRECIP', 'MSA-PRECIP'),
+    ('generate_hvct', 'hvct', '_HVCT', 'HVCT'),
+    ('generate_therm', 'therm', '_THERM', 'THERM'),
+]
+
+
+def tle_exponent_field(field):
+    """Decode a TLE field with an implied decimal point and exponent, e.g. ' 80000-4'"""
+    return float(f"{field[0].strip()}.{field[1:6]}e{field[6:8]}")
+
+
+def wav_header(num_samples, sample_rate):
+    """44-byte header for a mono 16-bit PCM WAV file"""
+    data_size = num_samples * 2
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b'data', data_size
+    )
+
+
+class PolyphaseResampler:
+    """Streaming rational resampler, equivalent to scipy.signal.resample_poly
+
+    Input is consumed in whole multiples of the decimation factor and each
+    block is filtered with enough history prepended that, once flush() has
+    returned the tail, the output matches resampling the whole recording at
+    once, sample for sample.
+    """
+
+    def __init__(self, rate_in, rate_out, window=('kaiser', 8.6)):
+        g = math.gcd(rate_in, rate_out)
+        self.up = rate_out // g
+        self.down = rate_in // g
+
+        max_rate = max(self.up, self.down)
+        half_len = 10 * max_rate
+        taps = firwin(2 * half_len + 1, 1.0 / max_rate, window=window) * self.up
+
+        # Pad the filter so its centre falls on an output sample, then skip
+        # the outputs before it to remove the filter delay
+        pre_pad = -half_len % self.down
+        self.taps = np.concatenate([np.zeros(pre_pad), taps])
+        self._skip = (half_len + pre_pad) // self.down
+
+        # History must cover the filter and stay aligned to the output grid
+        self.history_len = -(-len(self.taps) // (self.up * self.down)) * self.down
+        self._history = np.zeros(self.history_len)
+        self._pending = np.zeros(0)
+        self._samples_in = 0
+        self._samples_out = 0
+
+    def process(self, samples):
+        """Resample the next block of input, returning the output samples it completes"""
+        self._samples_in += len(samples)
+        y = self._filter(samples)
+        if self._skip:
+            skipped = min(self._skip, len(y))
+            y = y[skipped:]
+            self._skip -= skipped
+        self._samples_out += len(y)
+        return y
+
+    def flush(self):
+        """Return the output still held back by the filter delay at the end of input"""
+        remaining = -(-self._samples_in * self.up // self.down) - self._samples_out
+        zeros = np.zeros(((remaining + self._skip) // self.up + 1) * self.down)
+        y = self._filter(zeros)[self._skip:self._skip + remaining]
+        self._skip = 0
+        self._samples_out += len(y)
+        return y
+
+    def _filter(self, samples):
+        """Filter and resample a block, outputs delayed by the filter"""
+        x = np.concatenate([self._pending, samples])
+        usable = len(x) - len(x) % self.down
+        self._pending = x[usable:]
+
+        block = np.concatenate([self._history, x[:usable]])
+        self._history = block[len(block) - self.history_len:]
+
+        y = upfirdn(self.taps, block, self.up, self.down)
+        start = self.history_len * self.up // self.down
+        return y[start:start + usable * self.up // self.down]
+
+
+class DopplerFMDemodulator:
+    """Streaming FM demodulator for rtl_sdr IQ that tracks the Doppler shift
+
+    The IQ is mixed by the predicted shift before channel filtering, so the
+    carrier stays centred in the filter for the whole pass, and is then
+    decimated to the audio rate and discriminated on the same scale as
+    rtl_fm. A DC blocker, as rtl_fm -E dc, removes what is left of the
+    carrier offset, i.e. the dongle's frequency error.
+    """
+
+    def __init__(self, audio_rate, doppler, decimation=IQ_OVERSAMPLE, dc_time=0.1):
+        self.iq_rate = audio_rate * decimation
+        self.decimation = decimation
+        self.doppler = doppler
+
+        # Channel filter passing the audio rate's bandwidth, like rtl_fm -s
+        self.taps = firwin(16 * decimation + 1, 1.0 / decimation)
+        self._history = np.zeros(len(self.taps) - 1, dtype=np.complex128)
+        self._pending = np.zeros(0, dtype=np.complex128)
+        self._samples = 0
+        self._phase = 0.0
+        self._last = 1.0 + 0j
+
+        # One-pole DC blocker with a dc_time second time constant
+        self._dc_pole = math.exp(-1.0 / (dc_time * audio_rate))
+        self._dc_state = np.zeros(1)
+
+    def process(self, data):
+        """Demodulate the next block of interleaved unsigned 8-bit IQ"""
+        iq = np.frombuffer(data, dtype=np.uint8, count=len(data) // 2 * 2).astype(np.float64) - 127.5
+        z = iq[0::2] + 1j * iq[1::2]
+
+        # Mix the carrier down by the predicted shift, keeping the
+        # oscillator phase continuous from block to block
+        t = (self._samples + np.arange(len(z))) / self.iq_rate
+        phase = self._phase + np.cumsum(self.doppler(t)) * (2 * np.pi / self.iq_rate)
+        if len(z):
+            self._phase = phase[-1] % (2 * np.pi)
+        z = z * np.exp(-1j * phase)
+        self._samples += len(z)
+
+        # Channel filter and decimate; the history is a whole number of
+        # output samples so block boundaries stay on the output grid
+        x = np.concatenate([self._pending, z])
+        usable = len(x) - len(x) % self.decimation
+        self._pending = x[usable:]
+
+        block = np.concatenate([self._history, x[:usable]])
+        self._history = block[len(block) - len(self._history):]
+
+        start = len(self._history) // self.decimation
+        y = upfirdn(self.taps, block, 1, self.decimation)[start:start + usable // self.decimation]
+        if not len(y):
+            return np.zeros(0)
+
+        # Polar discriminator, 2**14 per half turn as in rtl_fm
+        prev = np.concatenate([[self._last], y[:-1]])
+        self._last = y[-1]
+        audio = np.angle(y * np.conj(prev)) * (16384 / np.pi)
+
+        # Remove the remaining carrier offset
+        audio, self._dc_state = lfilter([1, -1], [1, -self._dc_pole], audio, zi=self._dc_state)
+        return audio
+
 
 class NOAACapture:
     def __init__(self, config_path="~/noaa_reception/config.json"):
@@ -31,6 +221,39 @@ class NOAACapture:
         self.load_config()
         self.setup_logging()
 
+        # Parsed TLE records keyed by satellite name, see _load_tle_index()
+        self._tle_cache = {}
+        self._tle_mtime = None
+
+        # SGP4 models keyed by satellite name, with the TLE lines they came from
+        self._satrec_cache = {}
+
+        # Set to abort pending waits and recordings, see _handle_stop_signal()
+        self._cancel = threading.Event()
+
+        # Observer location, parsed once
+        self._obs_lat = math.radians(float(self.config['location']['latitude']))
+        self._obs_lon = math.radians(float(self.config['location']['longitude']))
+        self._obs_elev = float(self.config['location']['altitude'])
+        lat, lon = self._obs_lat, self._obs_lon
+
+        # Observer position in ECEF (km)
+        e2 = EARTH_FLATTENING * (2 - EARTH_FLATTENING)
+        n = EARTH_RADIUS / math.sqrt(1 - e2 * math.sin(lat)**2)
+        alt = self._obs_elev / 1000.0
+        self._site_ecef = np.array([
+            (n + alt) * math.cos(lat) * math.cos(lon),
+            (n + alt) * math.cos(lat) * math.sin(lon),
+            (n * (1 - e2) + alt) * math.sin(lat)
+        ])
+
+        # Rotation from ECEF into the observer's east/north/up frame
+        self._R_site = np.array([
+            [-math.sin(lon), math.cos(lon), 0.0],
+            [-math.sin(lat) * math.cos(lon), -math.sin(lat) * math.sin(lon), math.cos(lat)],
+            [math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)]
+        ])
+
     def load_config(self):
         """Load configuration from JSON file"""
         try:
@@ -57,37 +280,166 @@ class NOAACapture:
 
         log_file = os.path.join(log_dir, f"noaa_capture_{datetime.now().strftime('%Y%m%d')}.log")
 
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        handlers = [
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        # Loggers only enqueue records; a background thread does the writes so
+        # capture and decoding never block on the disk or the console. Unlike
+        # queue.Queue, SimpleQueue.put is reentrant, so the signal handlers
+        # can log without deadlocking on a put they interrupted
+        log_queue = queue.SimpleQueue()
+        self._log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+        self._log_listener.start()
+        atexit.register(self._log_listener.stop)
+
         logging.basicConfig(
             level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file),
-                logging.StreamHandler()
-            ]
+            format='%(message)s',
+            handlers=[logging.handlers.QueueHandler(log_queue)]
         )
         self.logger = logging.getLogger(__name__)
 
     def update_tle(self):
-        """Download latest TLE data for NOAA satellites"""
+        """Download latest TLE data for NOAA satellites
+
+        Returns the downloaded bytes, or None if the data is unchanged or the
+        download failed.
+        """
         self.logger.info("Updating TLE data...")
         tle_dir = self.config['directories']['tle']
         os.makedirs(tle_dir, exist_ok=True)
 
         tle_url = "https://celestrak.org/NORAD/elements/gp.php?GROUP=noaa&FORMAT=tle"
         tle_file = os.path.join(tle_dir, "weather.tle")
+        meta_file = tle_file + ".meta.json"
+
+        # Make the request conditional on the validators from the last download
+        headers = {}
+        if os.path.exists(tle_file):
+            try:
+                with open(meta_file, 'r') as f:
+                    meta = json.load(f)
+                if meta.get('etag'):
+                    headers['If-None-Match'] = meta['etag']
+                if meta.get('last_modified'):
+                    headers['If-Modified-Since'] = meta['last_modified']
+            except (OSError, json.JSONDecodeError):
+                pass
 
         try:
-            response = requests.get(tle_url, timeout=30)
-            response.raise_for_status()
+            with requests.get(tle_url, headers=headers, timeout=30, stream=True) as response:
+                if response.status_code == 304:
+                    self.logger.info("TLE data unchanged since last update")
+                    return None
 
-            with open(tle_file, 'w') as f:
-                f.write(response.text)
+                response.raise_for_status()
+
+                buf = BytesIO()
+                for chunk in response.iter_content(chunk_size=8192):
+                    buf.write(chunk)
+                data = buf.getvalue()
+
+                meta = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                }
+
+            self._ingest_tle_bytes(data)
+            with open(meta_file, 'w') as f:
+                json.dump(meta, f)
 
             self.logger.info(f"TLE data updated successfully: {tle_file}")
-            return True
+            return data
         except Exception as e:
             self.logger.error(f"Failed to update TLE data: {e}")
-            return False
+            return None
+
+    def _parse_tle_elements(self, line1, line2):
+        """Read the SGP4 mean elements from their fixed TLE columns, or None if malformed"""
+        xpdotp = 1440.0 / (2 * math.pi)  # rev/day -> rad/min
+
+        try:
+            year = int(line1[18:20])
+            year += 2000 if year < 57 else 1900
+            jd, fr = jday(year, 1, 1, 0, 0, 0)
+
+            return {
+                'satnum': int(line1[2:7]),
+                'epoch': (jd - 2433281.5) + fr + float(line1[20:32]) - 1,  # days since 1949 Dec 31
+                'ndot': float(line1[33:43]) / (xpdotp * 1440),
+                'nddot': tle_exponent_field(line1[44:52]) / (xpdotp * 1440 * 1440),
+                'bstar': tle_exponent_field(line1[53:61]),
+                'inclo': math.radians(float(line2[8:16])),
+                'nodeo': math.radians(float(line2[17:25])),
+                'ecco': float('.' + line2[26:33]),
+                'argpo': math.radians(float(line2[34:42])),
+                'mo': math.radians(float(line2[43:51])),
+                'no_kozai': float(line2[52:63]) / xpdotp
+            }
+        except (ValueError, IndexError):
+            return None
+
+    def _parse_tle_lines(self, lines):
+        """Index TLE text lines by satellite name"""
+        lines = [line.strip() for line in lines if line.strip()]
+
+        # Name, line 1 and line 2 for each satellite
+        cache = {}
+        for i in range(0, len(lines) - 2, 3):
+            cache[lines[i]] = {
+                'name': lines[i],
+                'line1': lines[i+1],
+                'line2': lines[i+2],
+                'elements': self._parse_tle_elements(lines[i+1], lines[i+2])
+            }
+        return cache
+
+    def _ingest_tle_bytes(self, buf):
+        """Write downloaded TLE data to disk and index it without re-reading the file"""
+        tle_dir = self.config['directories']['tle']
+        tle_file = os.path.join(tle_dir, "weather.tle")
+
+        # Write to a temporary file and swap it in atomically
+        fd, tmp_file = tempfile.mkstemp(dir=tle_dir, prefix=".weather.tle.")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(buf)
+            # mkstemp creates the file 0600; keep the usual weather.tle mode
+            os.chmod(tmp_file, 0o644)
+            os.replace(tmp_file, tle_file)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
+
+        self._tle_cache = self._parse_tle_lines(
+            line.decode('ascii', errors='replace') for line in BytesIO(buf)
+        )
+        self._tle_mtime = os.stat(tle_file).st_mtime
+
+        # Passes predicted from the old elements are stale
+        try:
+            os.remove(self._pass_cache_file())
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Failed to remove stale pass cache: {e}")
+
+    def _load_tle_index(self):
+        """Parse the TLE file into the in-memory cache if it changed on disk"""
+        tle_file = os.path.join(self.config['directories']['tle'], "weather.tle")
+
+        mtime = os.stat(tle_file).st_mtime
+        if mtime == self._tle_mtime:
+            return
+
+        with open(tle_file, 'r') as f:
+            self._tle_cache = self._parse_tle_lines(f)
+        self._tle_mtime = mtime
 
     def get_tle_data(self, sat_name):
         """Read TLE data for a specific satellite"""
@@ -98,75 +450,208 @@ class NOAACapture:
             return None
 
         try:
-            with open(tle_file, 'r') as f:
-                lines = f.readlines()
-
-            # Search for satellite name
-            for i in range(len(lines) - 2):
-                if sat_name in lines[i]:
-                    return {
-                        'name': lines[i].strip(),
-                        'line1': lines[i+1].strip(),
-                        'line2': lines[i+2].strip()
-                    }
-
-            self.logger.error(f"Satellite {sat_name} not found in TLE file")
-            return None
+            self._load_tle_index()
         except Exception as e:
             self.logger.error(f"Error reading TLE file: {e}")
             return None
 
-    def calculate_pass_duration(self, sat_name, aos_time):
-        """Calculate pass duration and max elevation"""
-        tle = self.get_tle_data(sat_name)
-        if not tle:
-            return 0, 0
+        tle = self._tle_cache.get(sat_name)
+        if tle is None:
+            # Fall back to a partial match, e.g. "NOAA 15" for "NOAA 15 [B]"
+            tle = next((t for name, t in self._tle_cache.items() if sat_name in name), None)
 
+        if tle is None:
+            self.logger.error(f"Satellite {sat_name} not found in TLE file")
+        return tle
+
+    def _get_satrec(self, sat_name, tle):
+        """Return the SGP4 model for a TLE, reusing the cached one while it is unchanged"""
+        lines = (tle['line1'], tle['line2'])
+        cached = self._satrec_cache.get(sat_name)
+        if cached and cached[0] == lines:
+            return cached[1]
+
+        # Initialise straight from the elements parsed at load time, leaving
+        # twoline2rv for lines those columns could not be read from
+        elements = tle.get('elements')
+        if elements:
+            sat = Satrec()
+            sat.sgp4init(
+                WGS72, 'i', elements['satnum'], elements['epoch'],
+                elements['bstar'], elements['ndot'], elements['nddot'],
+                elements['ecco'], elements['argpo'], elements['inclo'],
+                elements['mo'], elements['no_kozai'], elements['nodeo']
+            )
+        else:
+            sat = Satrec.twoline2rv(*lines)
+        self._satrec_cache[sat_name] = (lines, sat)
+        return sat
+
+    def _gmst(self, jd, fr):
+        """Greenwich mean sidereal time in radians for arrays of Julian dates"""
+        t = ((jd - 2451545.0) + fr) / 36525.0
+        seconds = (67310.54841 + (876600.0 * 3600.0 + 8640184.812866) * t
+                   + 0.093104 * t**2 - 6.2e-6 * t**3)
+        return np.radians(seconds / 240.0) % (2 * np.pi)
+
+    def _look_angles(self, jd, fr, r):
+        """Convert TEME positions (km) to elevation/azimuth (degrees) and range (km)"""
+        # TEME -> ECEF is a rotation about z by GMST (polar motion ignored)
+        theta = self._gmst(jd, fr)
+        cos_t, sin_t = np.cos(theta), np.sin(theta)
+        ecef = np.stack([
+            r[..., 0] * cos_t + r[..., 1] * sin_t,
+            r[..., 1] * cos_t - r[..., 0] * sin_t,
+            r[..., 2]
+        ], axis=-1)
+
+        # One matmul takes every sample into the local frame
+        enu = (ecef - self._site_ecef) @ self._R_site.T
+
+        rng = np.linalg.norm(enu, axis=-1)
+        el = np.degrees(np.arcsin(enu[..., 2] / rng))
+        az = np.degrees(np.arctan2(enu[..., 0], enu[..., 1])) % 360
+        return el, az, rng
+
+    def _elevation_at(self, sat, jd, fr):
+        """Elevation in degrees of a satellite at a single instant"""
+        _, r, _ = sat.sgp4(jd, fr)
+        el, _, _ = self._look_angles(jd, fr, np.array(r))
+        return float(el)
+
+    def _refine_crossing(self, sat, jd, fr_before, fr_after, rising, tolerance=1.0):
+        """Bisect a horizon crossing between two samples to within tolerance seconds"""
+        elevation_at = self._elevation_at
+        tolerance_days = tolerance / 86400
+
+        lo, hi = fr_before, fr_after
+        while hi - lo > tolerance_days:
+            mid = (lo + hi) / 2
+            if (elevation_at(sat, jd, mid) > 0) == rising:
+                hi = mid
+            else:
+                lo = mid
+        return (lo + hi) / 2
+
+    def _refine_peak(self, elevations, i_aos, i_los):
+        """Estimate max elevation from the vertex of a parabola through the top samples"""
+        i = i_aos + int(np.argmax(elevations[i_aos:i_los]))
+        y0, y1, y2 = elevations[i-1:i+2]
+        curvature = y0 - 2 * y1 + y2
+        if curvature >= 0:
+            return float(y1)
+        return float(y1 - (y2 - y0) ** 2 / (8 * curvature))
+
+    def _pass_cache_file(self):
+        """Path of the JSON pass prediction cache, kept with the TLE data it derives from"""
+        return os.path.join(self.config['directories']['tle'], 'passes.json')
+
+    def _pass_cache_key(self):
+        """Everything cached pass predictions depend on, or None without a TLE file"""
+        tle_file = os.path.join(self.config['directories']['tle'], "weather.tle")
         try:
-            # Setup observer
-            observer = ephem.Observer()
-            observer.lat = str(self.config['location']['latitude'])
-            observer.lon = str(self.config['location']['longitude'])
-            observer.elevation = self.config['location']['altitude']
-            observer.date = aos_time
+            tle_mtime = os.stat(tle_file).st_mtime
+        except OSError:
+            return None
 
-            # Setup satellite
-            sat = ephem.readtle(tle['name'], tle['line1'], tle['line2'])
+        return {
+            'tle_mtime': tle_mtime,
+            'location': self.config['location'],
+            'satellites': self.config['satellites'],
+            'min_elevation': self.config['reception']['min_elevation']
+        }
 
-            # Find max elevation and LOS
-            max_el = 0
-            current_time = aos_time
+    def _load_cached_passes(self, key, now, end_time):
+        """Return cached passes covering now..end_time, or None if they are unusable"""
+        try:
+            with open(self._pass_cache_file(), 'r') as f:
+                cache = json.load(f)
+
+            if cache['key'] != key or datetime.fromisoformat(cache['end']) < end_time:
+                return None
+
+            passes = []
+            for p in cache['passes']:
+                p['aos'] = datetime.fromisoformat(p['aos'])
+                p['los'] = datetime.fromisoformat(p['los'])
+                p['telemetry'] = {k: np.array(v, dtype=np.float32)
+                                  for k, v in p['telemetry'].items()}
+                if p['aos'] > now:
+                    passes.append(p)
+        except (OSError, KeyError, TypeError, ValueError):
+            return None
 
-            # Check elevation every 30 seconds for up to 20 minutes
-            for _ in range(40):
-                observer.date = current_time
-                sat.compute(observer)
+        # An exhausted cache is recomputed rather than trusted to be empty
+        return passes or None
+
+    def _save_pass_cache(self, key, end_time, passes):
+        """Write predicted passes to the cache file"""
+        cache = {
+            'key': key,
+            'end': end_time.isoformat(),
+            'passes': [
+                dict(p, aos=p['aos'].isoformat(), los=p['los'].isoformat(),
+                     telemetry={k: v.tolist() for k, v in p['telemetry'].items()})
+                for p in passes
+            ]
+        }
 
-                el = math.degrees(sat.alt)
-                if el > max_el:
-                    max_el = el
+        try:
+            cache_file = self._pass_cache_file()
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(cache_file, 'w') as f:
+                json.dump(cache, f)
+        except OSError as e:
+            self.logger.warning(f"Failed to write pass cache: {e}")
 
-                if el < 0 and current_time > aos_time:
-                    # Satellite has set
-                    duration = (current_time - aos_time) * 86400  # Convert to seconds
-                    return int(duration), int(max_el)
+    def predict_next_passes(self, hours=24):
+        """Predict satellite passes for the next N hours
 
-                current_time = ephem.Date(current_time + ephem.second * 30)
+        Each pass carries a 'telemetry' dict of float32 arrays sampled every
+        PREDICT_STEP seconds: 't' (seconds from AOS), 'el' and 'az' (degrees)
+        and 'range' (km).
 
-            return 600, int(max_el)  # Default 10 minutes if we don't find LOS
+        Predictions are cached for at least PASS_CACHE_HOURS and reused until
+        the TLE data or the relevant settings change.
+        """
+        self.logger.info(f"Predicting passes for next {hours} hours...")
 
-        except Exception as e:
-            self.logger.error(f"Error calculating pass duration: {e}")
-            return 600, 0
+        now = datetime.utcnow()
+        end_time = now + timedelta(hours=hours)
 
-    def predict_next_passes(self, hours=24):
-        """Predict satellite passes for the next N hours"""
-        self.logger.info(f"Predicting passes for next {hours} hours...")
+        key = self._pass_cache_key()
+        passes = self._load_cached_passes(key, now, end_time) if key else None
+        if passes is not None:
+            self.logger.info("Using cached pass predictions")
+        else:
+            cache_hours = max(hours, PASS_CACHE_HOURS)
+            passes = self._compute_passes(now, cache_hours)
+            if key:
+                self._save_pass_cache(key, now + timedelta(hours=cache_hours), passes)
+
+        passes = [p for p in passes if now < p['aos'] <= end_time]
+        for p in passes:
+            self.logger.info(
+                f"{p['satellite']}: AOS {p['aos'].strftime('%Y-%m-%d %H:%M:%S')} UTC, "
+                f"Max El: {p['max_elevation']:.1f}°, Duration: {p['duration']}s"
+            )
+        return passes
 
+    def _compute_passes(self, now, hours):
+        """Propagate all enabled satellites and find their passes over the next N hours"""
         passes = []
-        now = datetime.utcnow()
         end_time = now + timedelta(hours=hours)
 
+        # Sample the whole window in one go, with an extra hour so the
+        # last pass that rises before end_time also sets inside the grid
+        jd0, fr0 = jday(now.year, now.month, now.day, now.hour, now.minute,
+                        now.second + now.microsecond / 1e6)
+        offsets = np.arange(0, (hours + 1) * 3600 + PREDICT_STEP, PREDICT_STEP)
+        fr = fr0 + offsets / 86400.0
+        jd = np.full_like(fr, jd0)
+
+        # Collect every enabled satellite with a usable TLE
+        satellites = []
         for sat_name, sat_config in self.config['satellites'].items():
             if not sat_config['enabled']:
                 continue
@@ -176,49 +661,72 @@ class NOAACapture:
                 continue
 
             try:
-                # Setup observer
-                observer = ephem.Observer()
-                observer.lat = str(self.config['location']['latitude'])
-                observer.lon = str(self.config['location']['longitude'])
-                observer.elevation = self.config['location']['altitude']
-                observer.date = now
-
-                # Setup satellite
-                sat = ephem.readtle(tle['name'], tle['line1'], tle['line2'])
-
-                # Find passes
-                while observer.date.datetime() < end_time:
-                    try:
-                        tr, azr, tt, altt, ts, azs = observer.next_pass(sat)
-
-                        if tr.datetime() > end_time:
-                            break
-
-                        max_alt_deg = math.degrees(altt)
+                sat = self._get_satrec(sat_name, tle)
+                satellites.append((sat_name, sat_config, sat))
+            except Exception as e:
+                self.logger.error(f"Error predicting passes for {sat_name}: {e}")
 
-                        if max_alt_deg >= self.config['reception']['min_elevation']:
-                            duration, _ = self.calculate_pass_duration(sat_name, tr)
+        if not satellites:
+            return passes
 
-                            passes.append({
-                                'satellite': sat_name,
-                                'aos': tr.datetime(),
-                                'los': ts.datetime(),
-                                'max_elevation': max_alt_deg,
-                                'duration': duration,
-                                'frequency': sat_config['frequency']
-                            })
+        # Propagate all satellites over all samples in a single call,
+        # giving (satellite, sample) shaped arrays
+        sat_array = SatrecArray([sat for _, _, sat in satellites])
+        err, r, _ = sat_array.sgp4(jd, fr)
+        el, az, rng = self._look_angles(jd, fr, r)
 
-                            self.logger.info(
-                                f"{sat_name}: AOS {tr.datetime().strftime('%Y-%m-%d %H:%M:%S')} UTC, "
-                                f"Max El: {max_alt_deg:.1f}°, Duration: {duration}s"
-                            )
+        # Pass boundaries are where a satellite crosses the horizon;
+        # i_aos is the first sample above it, i_los the first below
+        visible = (el > 0) & (err == 0)
+        edges = np.diff(visible.astype(np.int8), axis=1)
 
-                        observer.date = ts + ephem.minute
+        # Hoisted out of the per-pass loop below
+        refine_crossing = self._refine_crossing
+        refine_peak = self._refine_peak
+        min_elevation = self.config['reception']['min_elevation']
 
-                    except ValueError:
-                        # No more passes
+        for k, (sat_name, sat_config, sat) in enumerate(satellites):
+            try:
+                rises = np.flatnonzero(edges[k] == 1) + 1
+                sets = np.flatnonzero(edges[k] == -1) + 1
+                if len(rises):
+                    # Skip a pass already in progress at the start of the window
+                    sets = sets[sets > rises[0]]
+
+                for i_aos, i_los in zip(rises, sets):
+                    # Refine AOS between the last sample below and first above the horizon
+                    aos_fr = refine_crossing(sat, jd0, fr[i_aos-1], fr[i_aos], rising=True)
+                    aos = now + timedelta(days=aos_fr - fr0)
+                    if aos > end_time:
                         break
 
+                    max_alt_deg = refine_peak(el[k], i_aos, i_los)
+
+                    if max_alt_deg >= min_elevation:
+                        los_fr = refine_crossing(sat, jd0, fr[i_los-1], fr[i_los], rising=False)
+                        los = now + timedelta(days=los_fr - fr0)
+                        duration = int((los - aos).total_seconds())
+
+                        # Keep the sampled track, including the samples either
+                        # side of AOS and LOS, so later stages need not propagate
+                        s = slice(i_aos - 1, i_los + 1)
+                        telemetry = {
+                            't': ((fr[s] - aos_fr) * 86400).astype(np.float32),
+                            'el': el[k, s].astype(np.float32),
+                            'az': az[k, s].astype(np.float32),
+                            'range': rng[k, s].astype(np.float32)
+                        }
+
+                        passes.append({
+                            'satellite': sat_name,
+                            'aos': aos,
+                            'los': los,
+                            'max_elevation': max_alt_deg,
+                            'duration': duration,
+                            'frequency': sat_config['frequency'],
+                            'telemetry': telemetry
+                        })
+
             except Exception as e:
                 self.logger.error(f"Error predicting passes for {sat_name}: {e}")
 
@@ -226,6 +734,85 @@ class NOAACapture:
         passes.sort(key=lambda x: x['aos'])
         return passes
 
+    def _doppler_shift(self, telemetry, frequency):
+        """Predicted Doppler shift in Hz on the telemetry time grid"""
+        range_rate = np.gradient(telemetry['range'].astype(np.float64), telemetry['t'])
+        return -frequency * range_rate / SPEED_OF_LIGHT
+
+    def _record_stream(self, stream, duration, sample_rate, resampled_file,
+                       raw_file=None, demodulator=None):
+        """Resample raw 16-bit audio from stream into an APT_SAMPLE_RATE WAV file
+
+        Reads for up to duration seconds of wall-clock time, also when the
+        stream stops delivering data, optionally copying the raw samples
+        to raw_file. With a DopplerFMDemodulator the stream is rtl_sdr IQ,
+        demodulated to sample_rate audio first. Returns True if the
+        recording was cancelled.
+        """
+        resampler = PolyphaseResampler(sample_rate, APT_SAMPLE_RATE)
+        # One second of audio, or of IQ
+        chunk_bytes = demodulator.iq_rate * 2 if demodulator else sample_rate * 2
+        fd = stream.fileno()
+        carry = b''
+        num_samples = 0
+        cancelled = False
+
+        raw = open(raw_file, 'wb') if raw_file else None
+        try:
+            with open(resampled_file, 'wb') as wav:
+                # Placeholder header, rewritten once the length is known
+                wav.write(wav_header(0, APT_SAMPLE_RATE))
+
+                deadline = time.monotonic() + duration
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    if self._cancel.is_set():
+                        cancelled = True
+                        break
+
+                    # Wait at most a second for data so the deadline and
+                    # cancellation still apply if the receiver stalls
+                    ready, _, _ = select.select([fd], [], [], min(remaining, 1.0))
+                    if not ready:
+                        continue
+
+                    data = os.read(fd, chunk_bytes)
+                    if not data:
+                        self.logger.warning("Receiver stopped before the end of the pass")
+                        break
+
+                    # Keep whole 16-bit samples or IQ pairs
+                    data = carry + data
+                    carry = data[len(data) - len(data) % 2:]
+                    data = data[:len(data) - len(carry)]
+
+                    if demodulator:
+                        x = demodulator.process(data)
+                        if raw:
+                            raw.write(np.clip(np.rint(x), -32768, 32767).astype('<i2').tobytes())
+                    else:
+                        x = np.frombuffer(data, dtype='<i2', count=len(data) // 2)
+                        if raw:
+                            raw.write(data)
+
+                    y = resampler.process(x)
+                    wav.write(np.clip(np.rint(y), -32768, 32767).astype('<i2').tobytes())
+                    num_samples += len(y)
+
+                y = resampler.flush()
+                wav.write(np.clip(np.rint(y), -32768, 32767).astype('<i2').tobytes())
+                num_samples += len(y)
+
+                wav.seek(0)
+                wav.write(wav_header(num_samples, APT_SAMPLE_RATE))
+        finally:
+            if raw:
+                raw.close()
+
+        return cancelled
+
     def capture_pass(self, pass_info):
         """Capture a satellite pass"""
         sat_name = pass_info['satellite']
@@ -239,6 +826,9 @@ class NOAACapture:
         audio_dir = self.config['directories']['audio']
         os.makedirs(audio_dir, exist_ok=True)
         audio_file = os.path.join(audio_dir, f"{filename_base}.wav")
+        resampled_file = os.path.join(audio_dir, f"{filename_base}_resampled.wav")
+        telemetry_file = os.path.join(audio_dir, f"{filename_base}_telemetry.npz")
+        save_raw_audio = self.config['processing'].get('save_raw_audio', True)
 
         self.logger.info(f"Starting capture: {sat_name} at {aos.strftime('%H:%M:%S')} UTC")
 
@@ -247,51 +837,98 @@ class NOAACapture:
         if aos > now:
             wait_seconds = (aos - now).total_seconds()
             self.logger.info(f"Waiting {wait_seconds:.0f} seconds until AOS...")
-            time.sleep(wait_seconds)
+            if self._cancel.wait(timeout=wait_seconds):
+                self.logger.info(f"Capture of {sat_name} cancelled")
+                return
 
         # RTL_FM command for NOAA APT reception
         gain = self.config['reception']['rtl_sdr_gain']
         sample_rate = self.config['reception']['sample_rate']
         freq_offset = self.config['reception']['frequency_offset']
 
-        rtl_fm_cmd = [
-            'rtl_fm',
-            '-f', str(frequency + freq_offset),
-            '-s', str(sample_rate),
-            '-g', str(gain),
-            '-p', '0',
-            '-E', 'dc',
-            '-F', '9',
-            '-A', 'fast',
-            audio_file
-        ]
+        # With Doppler correction the IQ is recorded with rtl_sdr and the
+        # predicted shift is removed before demodulation, see
+        # DopplerFMDemodulator; otherwise rtl_fm demodulates directly
+        telemetry = pass_info.get('telemetry')
+        doppler_correction = (self.config['reception'].get('doppler_correction', False)
+                              and telemetry is not None)
+
+        if doppler_correction:
+            rtl_cmd = [
+                'rtl_sdr',
+                '-f', str(frequency + freq_offset),
+                '-s', str(sample_rate * IQ_OVERSAMPLE),
+                '-g', str(gain),
+                '-p', '0',
+                '-'
+            ]
+        else:
+            rtl_cmd = [
+                'rtl_fm',
+                '-f', str(frequency + freq_offset),
+                '-s', str(sample_rate),
+                '-g', str(gain),
+                '-p', '0',
+                '-E', 'dc',
+                '-F', '9',
+                '-A', 'fast',
+                '-'
+            ]
 
         self.logger.info(f"Recording for {duration} seconds...")
-        self.logger.debug(f"Command: {' '.join(rtl_fm_cmd)}")
+        self.logger.debug(f"Command: {' '.join(rtl_cmd)}")
 
         try:
+            demodulator = None
+            if doppler_correction:
+                shift = self._doppler_shift(telemetry, frequency)
+                start = (datetime.utcnow() - aos).total_seconds()
+                demodulator = DopplerFMDemodulator(
+                    sample_rate, lambda t: np.interp(start + t, telemetry['t'], shift)
+                )
+                self.logger.info(f"Correcting Doppler shift of up to {np.abs(shift).max():.0f} Hz")
+
             # Start recording
-            process = subprocess.Popen(rtl_fm_cmd,
+            process = subprocess.Popen(rtl_cmd,
                                      stdout=subprocess.PIPE,
                                      stderr=subprocess.PIPE)
 
-            # Let it run for the pass duration
-            time.sleep(duration)
-
-            # Stop recording
-            process.terminate()
+            # Let it run for the pass duration, resampling as the audio arrives
             try:
-                process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                process.kill()
+                # Keep the predicted track with the raw audio
+                if save_raw_audio and telemetry is not None:
+                    np.savez(telemetry_file, **telemetry)
 
-            self.logger.info(f"Capture complete: {audio_file}")
+                cancelled = self._record_stream(
+                    process.stdout, duration, sample_rate, resampled_file,
+                    audio_file if save_raw_audio else None, demodulator
+                )
+            finally:
+                # Stop recording
+                process.terminate()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+            if cancelled:
+                # The pass was never decoded, so leave none of its partial
+                # recordings behind
+                for path in (resampled_file, audio_file, telemetry_file):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                self.logger.info(f"Capture of {sat_name} cancelled")
+                return
+
+            self.logger.info(f"Capture complete: {resampled_file}")
 
             # Process the audio into images
-            if os.path.exists(audio_file) and os.path.getsize(audio_file) > 0:
-                self.process_audio(audio_file, filename_base, sat_name)
+            if os.path.exists(resampled_file) and os.path.getsize(resampled_file) > 44:
+                self.process_audio(resampled_file, filename_base, sat_name)
             else:
-                self.logger.error(f"Audio file is empty or doesn't exist: {audio_file}")
+                self.logger.error(f"Audio file is empty or doesn't exist: {resampled_file}")
 
         except Exception as e:
             self.logger.error(f"Error during capture: {e}")
@@ -311,123 +948,118 @@ class NOAACapture:
         except Exception as e:
             self.logger.error(f"Failed to send to display: {e}")
 
-    def process_audio(self, audio_file, filename_base, sat_name):
-        """Process captured audio into images"""
-        self.logger.info(f"Processing audio: {audio_file}")
+    def _run_noaa_apt(self, resampled_file, output_file, mode=None):
+        """Decode one image with noaa-apt, returning its stderr on failure"""
+        noaa_apt_cmd = ['noaa-apt', resampled_file]
+        if mode:
+            noaa_apt_cmd += ['-c', mode]
+        noaa_apt_cmd += ['-o', output_file]
+
+        try:
+            subprocess.run(noaa_apt_cmd, check=True, capture_output=True)
+            return None
+        except subprocess.CalledProcessError as e:
+            return e.stderr.decode()
+
+    def _audio_has_signal(self, samples, window_seconds=5):
+        """Cheap check that APT_SAMPLE_RATE samples contain a signal worth decoding
+
+        Looks at the start, middle and end of the recording and passes if any
+        window has both a sane RMS level and a clear 2400 Hz subcarrier, as
+        a fraction of the window's total power.
+        """
+        config = self.config['processing']
+        min_rms = config.get('min_rms', 100)
+        min_carrier = config.get('min_carrier_fraction', 0.01)
+
+        window = window_seconds * APT_SAMPLE_RATE
+        if len(samples) < window:
+            return False
+
+        # Correlate 100 ms blocks against the subcarrier so a few Hz of
+        # frequency error does not smear the correlation
+        block = APT_SAMPLE_RATE // 10
+        ref = np.exp(-2j * np.pi * APT_CARRIER * np.arange(block) / APT_SAMPLE_RATE)
+
+        for start in (0, (len(samples) - window) // 2, len(samples) - window):
+            x = samples[start:start + window].astype(np.float64)
+            energy = np.dot(x, x)
+            rms = math.sqrt(energy / window)
+
+            blocks = x[:window - window % block].reshape(-1, block)
+            carrier = np.sum(np.abs(blocks @ ref) ** 2) * 2 / block / energy if energy else 0.0
+
+            self.logger.debug(f"Signal check at {start / APT_SAMPLE_RATE:.0f}s: "
+                              f"RMS {rms:.0f}, carrier fraction {carrier:.3f}")
+            if rms >= min_rms and carrier >= min_carrier:
+                return True
+
+        return False
+
+    def process_audio(self, resampled_file, filename_base, sat_name):
+        """Process captured 11025 Hz audio into images"""
+        self.logger.info(f"Processing audio: {resampled_file}")
 
         image_dir = self.config['directories']['images']
         os.makedirs(image_dir, exist_ok=True)
 
-        # Resample audio to 11025 Hz (required for noaa-apt)
-        resampled_file = audio_file.replace('.wav', '_resampled.wav')
+        # Map the samples rather than reading them in; only the pages that
+        # are actually looked at get loaded
+        if os.path.getsize(resampled_file) <= 44:
+            self.logger.error(f"Audio file is empty: {resampled_file}")
+            return
+        samples = np.memmap(resampled_file, dtype='<i2', mode='r', offset=44)
 
-        try:
-            sox_cmd = [
-                'sox', '-t', 'raw', '-r', '60000', '-e', 'signed', '-b', '16', '-c', '1',
-                audio_file,
-                '-r', '11025',
-                resampled_file
-            ]
-            subprocess.run(sox_cmd, check=True, capture_output=True)
-            self.logger.info("Audio resampled to 11025 Hz")
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"Failed to resample audio: {e}")
+        # Don't spend minutes in noaa-apt on a dead or noise-only recording
+        has_signal = self._audio_has_signal(samples)
+        del samples
+        if not has_signal:
+            self.logger.warning(f"No APT signal found in {resampled_file}, skipping decode")
+            try:
+                os.remove(resampled_file)
+            except:
+                pass
             return
 
-        # Generate images using noaa-apt
+        # Generate images using noaa-apt, one process per enabled variant
         config = self.config['processing']
+        jobs = [
+            (mode, os.path.join(image_dir, f"{filename_base}{suffix}.png"), label)
+            for flag, mode, suffix, label in NOAA_APT_VARIANTS
+            if config.get(flag, True)
+        ]
         first_image = None
 
-        # Basic image
-        if config.get('generate_basic', True):
-            output_file = os.path.join(image_dir, f"{filename_base}.png")
-            try:
-                noaa_apt_cmd = [
-                    'noaa-apt',
-                    resampled_file,
-                    '-o', output_file
-                ]
-                subprocess.run(noaa_apt_cmd, check=True, capture_output=True)
-                self.logger.info(f"Generated basic image: {output_file}")
-                if first_image is None:
-                    first_image = output_file
-            except subprocess.CalledProcessError as e:
-                self.logger.error(f"Failed to generate basic image: {e.stderr.decode()}")
-
-        # False color images (MSA, MCIR, etc.)
-        if config.get('generate_msa', True):
-            output_file = os.path.join(image_dir, f"{filename_base}_MSA.png")
-            try:
-                noaa_apt_cmd = [
-                    'noaa-apt',
-                    resampled_file,
-                    '-c', 'msa',
-                    '-o', output_file
-                ]
-                subprocess.run(noaa_apt_cmd, check=True, capture_output=True)
-                self.logger.info(f"Generated MSA image: {output_file}")
-            except subprocess.CalledProcessError as e:
-                self.logger.debug(f"MSA image generation skipped or failed: {e.stderr.decode()}")
-
-        if config.get('generate_msa_precip', True):
-            output_file = os.path.join(image_dir, f"{filename_base}_MSA_PRECIP.png")
-            try:
-                noaa_apt_cmd = [
-                    'noaa-apt',
-                    resampled_file,
-                    '-c', 'msa-precip',
-                    '-o', output_file
-                ]
-                subprocess.run(noaa_apt_cmd, check=True, capture_output=True)
-                self.logger.info(f"Generated MSA-PRECIP image: {output_file}")
-            except subprocess.CalledProcessError as e:
-                self.logger.debug(f"MSA-PRECIP image generation skipped or failed")
-
-        if config.get('generate_hvct', True):
-            output_file = os.path.join(image_dir, f"{filename_base}_HVCT.png")
-            try:
-                noaa_apt_cmd = [
-                    'noaa-apt',
-                    resampled_file,
-                    '-c', 'hvct',
-                    '-o', output_file
-                ]
-                subprocess.run(noaa_apt_cmd, check=True, capture_output=True)
-                self.logger.info(f"Generated HVCT image: {output_file}")
-            except subprocess.CalledProcessError as e:
-                self.logger.debug(f"HVCT image generation skipped or failed")
-
-        if config.get('generate_therm', True):
-            output_file = os.path.join(image_dir, f"{filename_base}_THERM.png")
-            try:
-                noaa_apt_cmd = [
-                    'noaa-apt',
-                    resampled_file,
-                    '-c', 'therm',
-                    '-o', output_file
-                ]
-                subprocess.run(noaa_apt_cmd, check=True, capture_output=True)
-                self.logger.info(f"Generated THERM image: {output_file}")
-            except subprocess.CalledProcessError as e:
-                self.logger.debug(f"THERM image generation skipped or failed")
+        if jobs:
+            max_workers = min(len(jobs), config.get('max_workers', os.cpu_count() or 1))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                errors = list(executor.map(
+                    lambda job: self._run_noaa_apt(resampled_file, job[1], job[0]), jobs
+                ))
+
+            for (mode, output_file, label), error in zip(jobs, errors):
+                if error is None:
+                    self.logger.info(f"Generated {label} image: {output_file}")
+                    if mode is None:
+                        first_image = output_file
+                elif mode is None:
+                    self.logger.error(f"Failed to generate basic image: {error}")
+                else:
+                    self.logger.debug(f"{label} image generation skipped or failed: {error}")
 
         # Send the first successfully generated image to e-Paper display
         if first_image and os.path.exists(first_image):
             self.send_to_epaper(first_image)
         else:
             # Try to find any generated image
-            all_images = glob.glob(os.path.join(image_dir, f"{filename_base}*.png"))
+            all_images = [
+                entry.path for entry in os.scandir(image_dir)
+                if entry.name.startswith(filename_base) and entry.name.endswith('.png')
+            ]
             if all_images:
-                self.send_to_epaper(sorted(all_images)[0])
+                self.send_to_epaper(min(all_images))
 
         # Clean up resampled file
-        if not config.get('save_raw_audio', True):
-            try:
-                os.remove(audio_file)
-                self.logger.info(f"Removed raw audio file: {audio_file}")
-            except:
-                pass
-
         try:
             os.remove(resampled_file)
         except:
@@ -450,11 +1082,19 @@ class NOAACapture:
 
         return next_pass
 
+    def _handle_stop_signal(self, signum, frame):
+        """Cancel any pending wait or recording on SIGTERM/SIGINT"""
+        self.logger.info(f"Received {signal.Signals(signum).name}, stopping...")
+        self._cancel.set()
+
     def run_scheduler(self):
         """Continuous scheduler that captures all passes"""
         self.logger.info("Starting NOAA satellite scheduler...")
 
-        while True:
+        signal.signal(signal.SIGTERM, self._handle_stop_signal)
+        signal.signal(signal.SIGINT, self._handle_stop_signal)
+
+        while not self._cancel.is_set():
             try:
                 next_pass = self.schedule_next_pass()
 
@@ -466,21 +1106,21 @@ class NOAACapture:
                     if wait_until > now:
                         wait_seconds = (wait_until - now).total_seconds()
                         self.logger.info(f"Sleeping for {wait_seconds/3600:.1f} hours...")
-                        time.sleep(wait_seconds)
+                        if self._cancel.wait(timeout=wait_seconds):
+                            break
 
                     # Capture the pass
                     self.capture_pass(next_pass)
                 else:
                     # No passes, check again in 6 hours
                     self.logger.info("No passes scheduled, checking again in 6 hours...")
-                    time.sleep(6 * 3600)
+                    self._cancel.wait(timeout=6 * 3600)
 
-            except KeyboardInterrupt:
-                self.logger.info("Scheduler stopped by user")
-                break
             except Exception as e:
                 self.logger.error(f"Error in scheduler: {e}")
-                time.sleep(300)  # Wait 5 minutes before retry
+                self._cancel.wait(timeout=300)  # Wait 5 minutes before retry
+
+        self.logger.info("Scheduler stopped")
 
 
 def main():
@@ -495,7 +1135,7 @@ def main():
     parser.add_argument(
         '--update-tle',
         action='store_true',
-        help='Update TLE data and exit'
+        help='Update TLE data (exits unless combined with --predict or --schedule)'
     )
     parser.add_argument(
         '--predict',
@@ -517,7 +1157,8 @@ def main():
     # Handle commands
     if args.update_tle:
         capture.update_tle()
-        return
+        if not (args.predict or args.schedule):
+            return
 
     if args.predict:
         passes = capture.predict_next_passes(hours=args.predict)